@@ -1,14 +1,65 @@
 import os
+import json
 import gspread
 from google.oauth2.service_account import Credentials
 from google.auth import default
-from flask import Flask, render_template, redirect, url_for, request, session, abort
+from google.auth.transport.requests import Request
+from google.auth.exceptions import RefreshError
+from requests.adapters import HTTPAdapter
+from flask import Flask, render_template, redirect, url_for, request, session, make_response
+from flask.json.provider import JSONProvider
 import time
+from datetime import timedelta
+import hashlib # For ETags
 import threading # For cache lock
 import random # For shuffling questions
+import tempfile
+from itertools import compress
+from functools import lru_cache
+from operator import itemgetter
+from collections import defaultdict
+from typing import NamedTuple
+import orjson # Fast JSON for Flask and the shared Redis cache
+import redis
+from jinja2 import FileSystemBytecodeCache
+from flask_session import Session
+from cachelib import FileSystemCache
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (also used for the session cookie)."""
+
+    @staticmethod
+    def _default(obj):
+        if hasattr(obj, '__html__'):
+            return str(obj.__html__())
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        # orjson has no object_hook etc.; Flask < 3.1 untags the session cookie through one
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev_default_strong_random_secret_key_123!")
+# Exam sessions expire after SESSION_LIFETIME_HOURS; the cookie is only rewritten when the session changes
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=int(os.environ.get("SESSION_LIFETIME_HOURS", 12)))
+app.config['SESSION_REFRESH_EACH_REQUEST'] = False
+IS_DEBUG_MODE = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
+
+# --- Template Setup ---
+# In production, templates never change on disk: skip the per-render mtime check
+# and keep compiled templates across worker restarts
+JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR", "/tmp/jinja_cache")
+if not IS_DEBUG_MODE:
+    os.makedirs(JINJA_BYTECODE_CACHE_DIR, exist_ok=True)
+    app.config['TEMPLATES_AUTO_RELOAD'] = False
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_BYTECODE_CACHE_DIR)
+    app.jinja_env.auto_reload = False
 
 # --- Configuration ---
 GOOGLE_SHEET_ID = os.environ.get("GOOGLE_SHEET_ID")
@@ -22,10 +73,138 @@ app.config['SUPPORT_EMAIL'] = os.environ.get("SUPPORT_EMAIL", "support@example.c
 app.config['SHOW_SUPPORT_INFO'] = bool(os.environ.get("SUPPORT_NAME") and os.environ.get("SUPPORT_EMAIL"))
 
 
-# --- Caching Setup (remains the same) ---
-EXAM_DATA_CACHE = {}
+# --- Caching Setup ---
+# Fetched questions, quota failures and other failures are cached separately,
+# each entry keyed by exam name and holding a 'timestamp' plus 'data' or 'error'.
+# Timestamps use time.monotonic(): unlike time.time() it never jumps when the
+# system clock is adjusted, which could otherwise expire or pin entries early/forever.
+# The dicts are never mutated once published: writers build a copy and rebind the
+# name, so readers can look entries up (or iterate) without CACHE_LOCK
+_SUCCESS_CACHE = {}
+_QUOTA_CACHE = {}
+_ERROR_CACHE = {}
+# Exams with a stale-while-revalidate refresh in flight (guarded by CACHE_LOCK),
+# kept apart from the entries so those stay read-only
+_REFRESHING_EXAMS = set()
+# Exam tab titles for the main page, refreshed by every sheet listing (incl. prewarm)
+_EXAM_TITLES_CACHE = None
+# The last full prime_cache(): the sheet's Drive modifiedTime, the tabs it listed
+# and the ones that parsed (header-only tabs never reach _SUCCESS_CACHE)
+_LAST_PRIME = None
 CACHE_DURATION_SECONDS = int(os.environ.get("CACHE_DURATION_SECONDS", 10 * 60))
+# Non-quota errors (e.g. a tab being renamed) are retried sooner
+ERROR_CACHE_SECONDS = 60
+# Expired questions are still served (while refreshing) until this hard limit
+CACHE_HARD_EXPIRY_SECONDS = 2 * CACHE_DURATION_SECONDS
+# Exam names come from the URL, so bound how many (including misses) are cached
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 64))
+# Warm every exam at startup and keep re-warming before entries expire
+PREWARM_CACHE = os.environ.get("PREWARM_CACHE", "True").lower() == "true"
+# Fetched exams are also written here so a restarted worker starts warm; empty disables it
+CACHE_SNAPSHOT_PATH = os.environ.get("CACHE_SNAPSHOT_PATH", "/tmp/exam_cache.json")
+_SNAPSHOT_LOCK = threading.Lock()
 CACHE_LOCK = threading.Lock()
+# Optional cache shared by every worker/instance, so Sheets is read once per TTL in total
+REDIS_URL = os.environ.get("REDIS_URL")
+REDIS_CLIENT = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+# Bump whenever the cached question layout or cell format changes: the Redis keys
+# and the disk snapshot both carry it, so neither serves entries parsed the old way
+CACHE_LAYOUT_VERSION = 3
+SHARED_CACHE_KEY_PREFIX = f"exam:v{CACHE_LAYOUT_VERSION}:"
+SHARED_PREWARM_KEY = "exam-cache:prewarm"
+SHARED_EXAM_TITLES_KEY = f"exam-titles:v{CACHE_LAYOUT_VERSION}"
+# How long a process that lost the prewarm claim waits for the claiming one to publish
+SHARED_PREWARM_WAIT_SECONDS = 60
+# Per-exam locks so only one thread fetches a given exam from Sheets at a time.
+# CACHE_LOCK only guards cache writes; reads are single dict lookups, atomic under the GIL
+_FETCH_LOCKS = defaultdict(threading.Lock)
+_FETCH_LOCKS_LOCK = threading.Lock()
+
+# --- Session Setup ---
+# Server-side sessions keep the cookie down to an id. SESSION_TYPE picks the store
+# ('redis' by default when REDIS_URL is set, or 'filesystem', kept in a cachelib
+# FileSystemCache since Flask-Session deprecated its own filesystem store); unset keeps signed cookies
+SESSION_TYPE = os.environ.get("SESSION_TYPE", "redis" if REDIS_CLIENT else "").lower()
+if SESSION_TYPE == 'redis' and REDIS_CLIENT:
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = REDIS_CLIENT
+    app.config['SESSION_KEY_PREFIX'] = 'session:'
+    Session(app)
+elif SESSION_TYPE == 'filesystem':
+    app.config['SESSION_TYPE'] = 'cachelib'
+    app.config['SESSION_CACHELIB'] = FileSystemCache(os.environ.get("SESSION_FILE_DIR", "/tmp/flask_session"))
+    Session(app)
+elif SESSION_TYPE:
+    app.logger.warning("Unsupported SESSION_TYPE '%s' (or REDIS_URL not set); using cookie sessions.", SESSION_TYPE)
+
+# --- Sheets API Request Parameters ---
+# Cell text as the sheet displays it (50%, dates, currency); the field masks
+# drop everything else from the responses
+VALUES_GET_PARAMS = {
+    'valueRenderOption': 'FORMATTED_VALUE', 'majorDimension': 'ROWS', 'fields': 'values'
+}
+VALUES_BATCH_GET_PARAMS = dict(VALUES_GET_PARAMS, fields='valueRanges(values)')
+SHEET_TITLES_PARAMS = {'fields': 'sheets.properties.title'}
+# Transient Sheets API failures are retried with exponential backoff and jitter
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+API_MAX_ATTEMPTS = 5
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 64
+# The cached Spreadsheet handle is reopened after these (lost access or credentials)
+SPREADSHEET_ACCESS_STATUS_CODES = {401, 403}
+API_BACKOFF_INITIAL_SECONDS = 0.5
+API_BACKOFF_MAX_SECONDS = 30
+
+# --- Sheet Layout ---
+# Column headers read from each exam tab, in the order the parser unpacks them
+EXPECTED_HEADERS = (
+    "Question", "Answer A", "Answer B", "Answer C", "Answer D",
+    "Correct Answer", "Explanation-Correct", "Explanation-Incorrect"
+)
+REQUIRED_HEADERS = ("Question", "Correct Answer")
+# Only these columns are fetched; the expected headers must all sit inside them
+QUESTION_SHEET_COLUMNS = "A:H"
+
+# --- Question Storage ---
+# Parsed questions are cached column-wise: one list per field, indexed by position
+QUESTION_COLUMNS = (
+    "id", "question", "option_a", "option_b", "option_c", "option_d",
+    "correct_idx", "explanation_correct", "explanation_incorrect"
+)
+OPTION_KEYS = ("A", "B", "C", "D")
+OPTION_INDEX = {key: i for i, key in enumerate(OPTION_KEYS)}
+
+class Question(NamedTuple):
+    """One flashcard, read out of the columnar exam cache."""
+    id: int
+    text: str
+    options: tuple  # answer texts in OPTION_KEYS order
+    correct_idx: int  # index into options, -1 if the sheet's correct answer is not A-D
+    exp_correct: str
+    exp_incorrect: str
+
+    @property
+    def labelled_options(self):
+        return zip(OPTION_KEYS, self.options)
+
+    @property
+    def correct_option_key(self):
+        return OPTION_KEYS[self.correct_idx] if self.correct_idx >= 0 else ''
+
+    @property
+    def correct_option_text(self):
+        return self.options[self.correct_idx] if self.correct_idx >= 0 else ''
+
+
+# --- gspread Client Singleton ---
+# Built once per process; credentials are only refreshed when they expire.
+_GSPREAD_CLIENT = None
+_SPREADSHEET = None
+_SPREADSHEET_LOCK = threading.Lock()
+_GSPREAD_CREDS = None
+# Separate from CACHE_LOCK: building the client reads the key file and can take a
+# while, and cache readers/writers shouldn't queue behind it
+_CLIENT_LOCK = threading.Lock()
 
 # --- Context Processor to Inject Support Info into all Templates ---
 @app.context_processor
@@ -42,9 +221,57 @@ def inject_support_info():
 # Ensure question fetching/caching includes randomization.
 # <PASTE THE GOOGLE SHEETS AND CACHING FUNCTIONS FROM YOUR LAST WORKING app.py HERE>
 def get_gspread_client():
+    """Returns the process-wide gspread client, authenticating on first use."""
+    global _GSPREAD_CLIENT, _GSPREAD_CREDS
+    client, creds = _GSPREAD_CLIENT, _GSPREAD_CREDS
+    if client is None:
+        with _CLIENT_LOCK:
+            if _GSPREAD_CLIENT is None:
+                _GSPREAD_CLIENT, _GSPREAD_CREDS = _build_gspread_client()
+            client, creds = _GSPREAD_CLIENT, _GSPREAD_CREDS
+    if creds is not None and creds.expired:
+        try:
+            creds.refresh(Request())
+        except RefreshError as e:
+            app.logger.error("Error refreshing Google credentials, re-authenticating: %s", e)
+            _reset_gspread_client()
+            return get_gspread_client()
+        except Exception as e:
+            app.logger.error("Error refreshing Google credentials: %s", e)
+    return client
+
+def _reset_gspread_client():
+    """Drops the cached client so the next get_gspread_client() re-authenticates."""
+    global _GSPREAD_CLIENT, _GSPREAD_CREDS
+    with _CLIENT_LOCK:
+        _GSPREAD_CLIENT, _GSPREAD_CREDS = None, None
+    _reset_spreadsheet()
+
+def get_spreadsheet(client):
+    """Returns the opened exam spreadsheet. Opening costs a metadata round trip,
+       so the handle is kept until an auth error or client reset drops it."""
+    global _SPREADSHEET
+    spreadsheet = _SPREADSHEET
+    if spreadsheet is None:
+        with _SPREADSHEET_LOCK:
+            if _SPREADSHEET is None:
+                _SPREADSHEET = _call_with_backoff(client.open_by_key, GOOGLE_SHEET_ID)
+            spreadsheet = _SPREADSHEET
+    return spreadsheet
+
+def _reset_spreadsheet():
+    global _SPREADSHEET
+    with _SPREADSHEET_LOCK:
+        _SPREADSHEET = None
+
+def _build_gspread_client():
     """Authenticates with Google Sheets API."""
     try:
-        scopes = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+        scopes = [
+            'https://www.googleapis.com/auth/spreadsheets.readonly',
+            # Only used to read the sheet's modifiedTime before a prewarm round
+            'https://www.googleapis.com/auth/drive.metadata.readonly'
+        ]
         if os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
             creds = Credentials.from_service_account_file(
                 os.environ['GOOGLE_APPLICATION_CREDENTIALS'], scopes=scopes
@@ -52,10 +279,38 @@ def get_gspread_client():
         else:
             creds, _ = default(scopes=scopes)
         client = gspread.authorize(creds)
-        return client
+        # One pooled keep-alive session for every thread, instead of requests' default of 10 connections
+        http_session = client.http_client.session if hasattr(client, 'http_client') else client.session
+        http_session.mount("https://", HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE))
+        app.logger.info("Initialized gspread client.")
+        return client, creds
     except Exception as e:
-        app.logger.error(f"Error initializing gspread client: {e}")
-        return None
+        app.logger.error("Error initializing gspread client: %s", e)
+        return None, None
+
+def _api_status_code(error):
+    """HTTP status of a gspread APIError (None if it carries no response)."""
+    response = getattr(error, 'response', None)
+    return response.status_code if response is not None else None
+
+def _call_with_backoff(fn, *args, **kwargs):
+    """Calls a Sheets API function, retrying quota (429) and transient server errors.
+       Honors Retry-After when the API sends it; re-raises once attempts run out."""
+    for attempt in range(API_MAX_ATTEMPTS):
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status_code = _api_status_code(e)
+            if status_code not in RETRYABLE_STATUS_CODES or attempt + 1 == API_MAX_ATTEMPTS:
+                raise
+            retry_after = e.response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = min(int(retry_after), API_BACKOFF_MAX_SECONDS)
+            else:
+                delay = min(API_BACKOFF_INITIAL_SECONDS * 2 ** attempt, API_BACKOFF_MAX_SECONDS)
+                delay += random.uniform(0, API_BACKOFF_INITIAL_SECONDS)
+            app.logger.warning("Sheets API returned %s; retrying in %.1fs (attempt %s/%s).", status_code, delay, attempt + 1, API_MAX_ATTEMPTS)
+            time.sleep(delay)
 
 def get_exam_sheets(client):
     """Gets all sheet names (exams) from the Google Sheet,
@@ -68,119 +323,601 @@ def get_exam_sheets(client):
         return [], "gspread client not available."
         
     try:
-        spreadsheet = client.open_by_key(GOOGLE_SHEET_ID)
-        app.logger.info("Fetching all worksheet titles from Google Sheet for exam list...")
-        all_worksheet_titles = [sheet.title for sheet in spreadsheet.worksheets()]
-        app.logger.info(f"ALL TITLES RETRIEVED: {all_worksheet_titles}")
-
-        exam_titles = [
-            sheet_title for sheet_title in all_worksheet_titles
-            if not sheet_title.startswith('_')
-        ]
-        app.logger.info(f"FILTERED EXAM TITLES: {exam_titles}")
-        return exam_titles, None
+        spreadsheet = get_spreadsheet(client)
+        return _exam_sheet_titles(spreadsheet), None
     except gspread.exceptions.SpreadsheetNotFound:
-        app.logger.error(f"Spreadsheet not found with ID: {GOOGLE_SHEET_ID}.")
+        app.logger.error("Spreadsheet not found with ID: %s.", GOOGLE_SHEET_ID)
         return [], "Spreadsheet not found."
     except gspread.exceptions.APIError as e:
-        app.logger.error(f"Google Sheets API Error fetching sheet names: {e}")
-        status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+        app.logger.error("Google Sheets API Error fetching sheet names: %s", e)
+        status_code = _api_status_code(e)
+        if status_code in SPREADSHEET_ACCESS_STATUS_CODES: _reset_spreadsheet()
         if status_code == 429:
             return [], "Quota exceeded while fetching list of exams."
         return [], f"A Google Sheets API error occurred: {e}"
+    except RefreshError as e:
+        app.logger.error("Google credentials rejected fetching sheet names: %s", e)
+        _reset_gspread_client()
+        return [], "Could not authenticate with Google Sheets."
     except Exception as e:
-        app.logger.error(f"An unexpected error in get_exam_sheets: {e}")
+        app.logger.error("An unexpected error in get_exam_sheets: %s", e)
         return [], f"An unexpected error occurred while fetching sheet names: {e}"
 
-def _fetch_and_parse_questions(worksheet, exam_name):
-    """Helper function to fetch and parse questions using get_values()."""
+def _exam_sheet_titles(spreadsheet):
+    """Exam tab titles of an opened spreadsheet, skipping underscore tabs."""
+    metadata = _call_with_backoff(spreadsheet.fetch_sheet_metadata, params=SHEET_TITLES_PARAMS)
+
+    exam_titles, hidden_titles = [], []
+    for sheet in metadata.get('sheets', []):
+        sheet_title = sheet['properties']['title']
+        (hidden_titles if sheet_title.startswith('_') else exam_titles).append(sheet_title)
+
+    app.logger.debug("Exam titles: %s. Skipped underscore titles: %s", exam_titles, hidden_titles)
+    global _EXAM_TITLES_CACHE
+    _EXAM_TITLES_CACHE = {'timestamp': time.monotonic(), 'data': exam_titles}
+    return exam_titles
+
+def get_cached_exam_sheets():
+    """Returns (exam titles, error), listing the sheet only when the cached titles expired."""
+    cached_entry = _EXAM_TITLES_CACHE
+    if cached_entry and time.monotonic() - cached_entry['timestamp'] < CACHE_DURATION_SECONDS:
+        return cached_entry['data'], None
+    shared_titles = _load_shared_exam_titles(CACHE_DURATION_SECONDS)
+    if shared_titles is not None:
+        return shared_titles, None
+    client = get_gspread_client()
+    if not client:
+        app.logger.error("No gspread client to list exams.")
+        return [], "Could not connect to data source."
+    return get_exam_sheets(client)
+
+def _shared_cache_key(exam_name):
+    return SHARED_CACHE_KEY_PREFIX + exam_name
+
+def _load_shared_cached_questions(exam_name):
+    """Copies an exam another worker already fetched from Redis into the local cache."""
+    if not REDIS_CLIENT: return None
+    try:
+        payload = REDIS_CLIENT.get(_shared_cache_key(exam_name))
+    except redis.RedisError as e:
+        app.logger.error("Redis error reading '%s' from shared cache: %s", exam_name, e)
+        return None
+    if payload is None: return None
+    shared_entry = orjson.loads(payload)
+    # Redis holds wall-clock fetch times, comparable across machines; convert to local monotonic
+    shared_entry['timestamp'] = time.monotonic() - max(0.0, time.time() - shared_entry['fetched_at'])
+    _store_cached_questions(exam_name, shared_entry['data'], None, shared_entry['timestamp'], publish=False)
+    app.logger.info("Loaded '%s' from shared cache.", exam_name)
+    return shared_entry
+
+def _save_shared_cached_questions(exam_name, questions, timestamp):
+    if not REDIS_CLIENT: return
+    try:
+        REDIS_CLIENT.set(
+            _shared_cache_key(exam_name),
+            orjson.dumps({'fetched_at': time.time() - (time.monotonic() - timestamp), 'data': questions}),
+            ex=CACHE_DURATION_SECONDS
+        )
+    except redis.RedisError as e:
+        app.logger.error("Redis error writing '%s' to shared cache: %s", exam_name, e)
+
+def _load_shared_exam_titles(max_age):
+    """Copies the exam titles last published to Redis into the local cache, if they
+       were fetched within max_age seconds. Returns them, or None."""
+    if not REDIS_CLIENT: return None
+    try:
+        payload = REDIS_CLIENT.get(SHARED_EXAM_TITLES_KEY)
+    except redis.RedisError as e:
+        app.logger.error("Redis error reading exam titles from shared cache: %s", e)
+        return None
+    if payload is None: return None
+    shared_entry = orjson.loads(payload)
+    age = max(0.0, time.time() - shared_entry['fetched_at'])
+    if age >= max_age: return None
+    global _EXAM_TITLES_CACHE
+    _EXAM_TITLES_CACHE = {'timestamp': time.monotonic() - age, 'data': shared_entry['data']}
+    return shared_entry['data']
+
+def _save_shared_exam_titles(exam_names, timestamp):
+    """Publishes a prewarm round's exam titles. Written after the round's exams, so
+       a process that sees them can copy every exam from Redis."""
+    if not REDIS_CLIENT: return
+    try:
+        REDIS_CLIENT.set(
+            SHARED_EXAM_TITLES_KEY,
+            orjson.dumps({'fetched_at': time.time() - (time.monotonic() - timestamp), 'data': exam_names}),
+            ex=CACHE_DURATION_SECONDS
+        )
+    except redis.RedisError as e:
+        app.logger.error("Redis error writing exam titles to shared cache: %s", e)
+
+def _wait_for_shared_exam_titles(max_age):
+    """Polls Redis (for up to SHARED_PREWARM_WAIT_SECONDS) until the process that
+       claimed this prewarm round publishes its exam titles. None if it never does."""
+    deadline = time.monotonic() + SHARED_PREWARM_WAIT_SECONDS
+    while True:
+        exam_names = _load_shared_exam_titles(max_age)
+        if exam_names is not None or time.monotonic() >= deadline:
+            return exam_names
+        time.sleep(1)
+
+def _claim_shared_prewarm(interval):
+    """True if this process should fetch from Sheets for this prewarm round.
+       With a shared cache only one process per interval does; the rest read Redis."""
+    if not REDIS_CLIENT: return True
+    try:
+        return bool(REDIS_CLIENT.set(SHARED_PREWARM_KEY, os.getpid(), nx=True, ex=max(1, int(interval))))
+    except redis.RedisError as e:
+        app.logger.error("Redis error claiming prewarm round: %s", e)
+        return True
+
+def _save_cache_snapshot():
+    """Writes every successfully fetched exam to CACHE_SNAPSHOT_PATH (atomically)."""
+    if not CACHE_SNAPSHOT_PATH: return
+    # One writer per process at a time, so the last write holds the newest cache;
+    # each write gets its own temp file, so other processes never collide with it
+    with _SNAPSHOT_LOCK:
+        # Monotonic clocks restart with the machine, so store wall-clock fetch times
+        wall_offset = time.time() - time.monotonic()
+        snapshot = {'version': CACHE_LAYOUT_VERSION, 'exams': {
+            exam_name: {'fetched_at': wall_offset + cached_entry['timestamp'], 'data': cached_entry['data']}
+            for exam_name, cached_entry in _SUCCESS_CACHE.items()
+        }}
+        temp_path = None
+        try:
+            temp_fd, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(CACHE_SNAPSHOT_PATH)), suffix='.tmp'
+            )
+            with os.fdopen(temp_fd, 'wb') as snapshot_file:
+                snapshot_file.write(orjson.dumps(snapshot))
+            os.replace(temp_path, CACHE_SNAPSHOT_PATH)
+        except OSError as e:
+            app.logger.error("Could not write cache snapshot to %s: %s", CACHE_SNAPSHOT_PATH, e)
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def _load_cache_snapshot():
+    """Fills the cache from the last snapshot, skipping exams past the hard expiry.
+       Runs at import in every worker, so a bad snapshot (or entry) is logged and skipped."""
+    if not CACHE_SNAPSHOT_PATH: return
     try:
-        all_values = worksheet.get_values()
-    except Exception as e_gv:
-        app.logger.error(f"Error calling worksheet.get_values() for exam '{exam_name}': {e_gv}")
-        return [], f"Could not retrieve values from worksheet '{exam_name}': {e_gv}"
+        with open(CACHE_SNAPSHOT_PATH, 'rb') as snapshot_file:
+            snapshot = orjson.loads(snapshot_file.read())
+    except FileNotFoundError:
+        return
+    except (OSError, orjson.JSONDecodeError) as e:
+        app.logger.error("Could not read cache snapshot from %s: %s", CACHE_SNAPSHOT_PATH, e)
+        return
+    exams = snapshot.get('exams') if isinstance(snapshot, dict) and snapshot.get('version') == CACHE_LAYOUT_VERSION else None
+    if not isinstance(exams, dict):
+        app.logger.warning("Ignoring cache snapshot %s: not cache layout v%s.", CACHE_SNAPSHOT_PATH, CACHE_LAYOUT_VERSION)
+        return
+    current_time, loaded = time.monotonic(), 0
+    with CACHE_LOCK:
+        for exam_name, snapshot_entry in exams.items():
+            try:
+                age = max(0.0, time.time() - snapshot_entry['fetched_at'])
+                questions = snapshot_entry['data']
+                if any(len(questions[column]) != len(questions['id']) for column in QUESTION_COLUMNS):
+                    raise ValueError("question columns differ in length")
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                app.logger.warning("Skipping malformed cache snapshot entry '%s': %r", exam_name, e)
+                continue
+            if age < CACHE_HARD_EXPIRY_SECONDS:
+                _put_cached_entry(exam_name, questions, None, current_time - age)
+                loaded += 1
+    app.logger.info("Loaded %s exams from cache snapshot %s.", loaded, CACHE_SNAPSHOT_PATH)
+
+def _sheet_range(exam_name):
+    """A1 range of an exam's question columns, quoted so any tab title is valid."""
+    return "'{}'!{}".format(exam_name.replace("'", "''"), QUESTION_SHEET_COLUMNS)
 
+def _fetch_and_parse_questions(spreadsheet, exam_name):
+    """Helper function to fetch and parse questions with a single values.get call."""
+    response = _call_with_backoff(spreadsheet.values_get, _sheet_range(exam_name), params=VALUES_GET_PARAMS)
+    return _parse_question_values(response.get('values', []), exam_name)
+
+def _parse_question_values(all_values, exam_name):
+    """Parses the raw rows of an exam sheet (header row first) into questions."""
     if not all_values or len(all_values) < 2:
-        app.logger.warning(f"No data or no data rows in '{exam_name}'. Values count: {len(all_values) if all_values else 0}")
-        return [], f"No questions found for exam '{exam_name}'. Sheet empty or only header."
+        app.logger.warning("No data or no data rows in '%s'. Values count: %s", exam_name, len(all_values) if all_values else 0)
+        return None, f"No questions found for exam '{exam_name}'. Sheet empty or only header."
 
     header_row = [str(h).strip() for h in all_values[0]]
     data_rows = all_values[1:]
-    expected_headers = {
-        "question_col": "Question", "ans_a_col": "Answer A", "ans_b_col": "Answer B",
-        "ans_c_col": "Answer C", "ans_d_col": "Answer D", "correct_col": "Correct Answer",
-        "exp_correct_col": "Explanation-Correct", "exp_incorrect_col": "Explanation-Incorrect"
-    }
 
-    if not all(h_key in header_row for h_key in [expected_headers["question_col"], expected_headers["correct_col"]]):
-        app.logger.error(f"Missing critical headers in '{exam_name}'. Found: {header_row}.")
-        return [], f"Sheet '{exam_name}' is missing critical headers (Question, Correct Answer)."
+    if not all(h in header_row for h in REQUIRED_HEADERS):
+        app.logger.error("Missing critical headers in '%s'. Found: %s.", exam_name, header_row)
+        return None, f"Sheet '{exam_name}' is missing critical headers (Question, Correct Answer)."
 
-    questions = []
-    for idx, row_values in enumerate(data_rows):
-        row_dict = {header_name: (str(row_values[i]) if i < len(row_values) else '') for i, header_name in enumerate(header_row)}
-        question_text = row_dict.get(expected_headers["question_col"], "").strip()
-        correct_answer_key = row_dict.get(expected_headers["correct_col"], "").strip().upper()
+    # Transpose the rows into columns in one pass (short rows padded with ''), plus
+    # a trailing blank column that absent optional headers resolve to via index -1
+    width = len(header_row)
+    blank_row = [''] * width
+    columns = list(zip(*[row + blank_row[len(row):] if len(row) < width else row for row in data_rows]))
+    columns.append(('',) * len(data_rows))
+    (question_col, ans_a_col, ans_b_col, ans_c_col, ans_d_col,
+     correct_col, exp_correct_col, exp_incorrect_col) = itemgetter(*[
+        header_row.index(h) if h in header_row else -1 for h in EXPECTED_HEADERS
+    ])(columns)
 
-        if not question_text or not correct_answer_key:
-            app.logger.warning(f"Skipping row {idx+2} in '{exam_name}': empty Question/Correct Answer.")
-            continue
-        
-        questions.append({
-            "id": idx, 
-            "question": question_text,
-            "options": {key[0].upper(): row_dict.get(expected_headers[f"ans_{key[0].lower()}_col"], '') for key in ["A", "B", "C", "D"]},
-            "correct_option_key": correct_answer_key,
-            "explanation_correct": row_dict.get(expected_headers["exp_correct_col"], ''),
-            "explanation_incorrect": row_dict.get(expected_headers["exp_incorrect_col"], '')
-        })
+    # Build the cache column by column, then keep only rows that have both a
+    # question and a correct answer
+    string_pool = {}
+    pooled, _str = string_pool.setdefault, str
+
+    def column(values):
+        return [_str(value) for value in values]
+
+    def pooled_column(values):
+        # Repeated cells (blank explanations, common options) share one string object
+        return list(compress([pooled(value, value) for value in column(values)], keep))
+
+    question_texts = [text.strip() for text in column(question_col)]
+    # Well-formed keys ('A'-'D') are used as-is; only the rest get stripped and upper-cased
+    correct_keys = [key if key in OPTION_INDEX else key.strip().upper() for key in column(correct_col)]
+    keep = [bool(text and key) for text, key in zip(question_texts, correct_keys)]
+
+    skipped_rows = [idx + 2 for idx, kept in enumerate(keep) if not kept]
+    if skipped_rows:
+        app.logger.warning("Skipping rows %s in '%s': empty Question/Correct Answer.", skipped_rows, exam_name)
+    # Kept, but with correct_idx -1: no option is marked correct and every answer is wrong
+    invalid_key_rows = [idx + 2 for idx, key in enumerate(correct_keys) if keep[idx] and key not in OPTION_INDEX]
+    if invalid_key_rows:
+        app.logger.warning("Rows %s in '%s' have a Correct Answer other than %s.", invalid_key_rows, exam_name, "/".join(OPTION_KEYS))
+
+    questions = {
+        "id": list(compress(range(len(data_rows)), keep)),
+        "question": list(compress(question_texts, keep)),
+        "option_a": pooled_column(ans_a_col),
+        "option_b": pooled_column(ans_b_col),
+        "option_c": pooled_column(ans_c_col),
+        "option_d": pooled_column(ans_d_col),
+        "correct_idx": [OPTION_INDEX.get(key, -1) for key in compress(correct_keys, keep)],
+        "explanation_correct": pooled_column(exp_correct_col),
+        "explanation_incorrect": pooled_column(exp_incorrect_col)
+    }
     
-    if not questions:
-        app.logger.warning(f"No valid questions processed for '{exam_name}'.")
-        return [], f"No valid questions found for exam '{exam_name}' after processing."
+    if not questions["id"]:
+        app.logger.warning("No valid questions processed for '%s'.", exam_name)
+        return None, f"No valid questions found for exam '{exam_name}' after processing."
     
-    app.logger.info(f"Parsed {len(questions)} questions for exam '{exam_name}'.")
+    app.logger.info("Parsed %s questions for exam '%s'.", len(questions['id']), exam_name)
     return questions, None
 
+def _question_count(questions):
+    return len(questions["id"]) if questions else 0
+
+def _question_view(questions, i):
+    """The Question at position i of an exam's columnar cache."""
+    return Question(
+        questions["id"][i], questions["question"][i],
+        (questions["option_a"][i], questions["option_b"][i],
+         questions["option_c"][i], questions["option_d"][i]),
+        questions["correct_idx"][i],
+        questions["explanation_correct"][i], questions["explanation_incorrect"][i]
+    )
+
 def get_questions_for_exam_from_sheet(client, exam_name):
+    if not GOOGLE_SHEET_ID: return None, "GOOGLE_SHEET_ID not set."
+    if not client: return None, "gspread client not available."
+    try:
+        spreadsheet = get_spreadsheet(client)
+        return _fetch_and_parse_questions(spreadsheet, exam_name)
+    except gspread.exceptions.APIError as e:
+        status_code = _api_status_code(e)
+        if status_code == 400:
+            # values.get rejects a range naming a tab that does not exist
+            app.logger.error("Worksheet '%s' not found in %s.", exam_name, GOOGLE_SHEET_ID)
+            return None, f"Exam tab '{exam_name}' not found."
+        app.logger.error("Sheets API Error for %s: %s", exam_name, e)
+        if status_code in SPREADSHEET_ACCESS_STATUS_CODES: _reset_spreadsheet()
+        if status_code == 429: return None, "Quota exceeded fetching questions."
+        return None, f"Sheets API error: {getattr(e, 'message', str(e))}"
+    except RefreshError as e:
+        app.logger.error("Google credentials rejected fetching %s: %s", exam_name, e)
+        _reset_gspread_client()
+        return None, "Could not authenticate with Google Sheets."
+    except Exception as e:
+        app.logger.error("Error fetching questions for %s: %s", exam_name, e)
+        return None, f"Unexpected error fetching questions: {e}"
+
+def _get_fetch_lock(exam_name):
+    with _FETCH_LOCKS_LOCK:
+        return _FETCH_LOCKS[exam_name]
+
+def _fresh_cached_result(exam_name, current_time):
+    """Returns (questions, error) if the exam has an unexpired cache entry, else None.
+       While a failed refresh is cached, the last good questions (if kept) win over its error."""
+    success_entry = _SUCCESS_CACHE.get(exam_name)
+    if success_entry and current_time - success_entry['timestamp'] < CACHE_DURATION_SECONDS:
+        return success_entry['data'], None
+    error_entry = _QUOTA_CACHE.get(exam_name)
+    if not (error_entry and current_time - error_entry['timestamp'] < CACHE_DURATION_SECONDS):
+        error_entry = _ERROR_CACHE.get(exam_name)
+        if not (error_entry and current_time - error_entry['timestamp'] < ERROR_CACHE_SECONDS):
+            return None
+    if success_entry and current_time - success_entry['timestamp'] < CACHE_HARD_EXPIRY_SECONDS:
+        return success_entry['data'], None
+    return None, error_entry['error']
+
+def get_cached_questions_for_exam(exam_name):
+    """Returns (questions, error) for an exam. Cache hits never touch the
+       gspread client; it is only obtained when Sheets must be read."""
+    current_time = time.monotonic()
+    cached_result = _fresh_cached_result(exam_name, current_time)
+    if cached_result:
+        app.logger.info("Serving '%s' from cache.", exam_name)
+        return cached_result
+
+    # Stale-while-revalidate: serve expired questions now and refresh in the background,
+    # unless they are past the hard expiry, in which case wait for fresh data
+    stale_entry = _SUCCESS_CACHE.get(exam_name)
+    if stale_entry and current_time - stale_entry['timestamp'] < CACHE_HARD_EXPIRY_SECONDS:
+        with CACHE_LOCK:
+            start_refresh = exam_name not in _REFRESHING_EXAMS
+            _REFRESHING_EXAMS.add(exam_name)
+        if start_refresh:
+            app.logger.info("Serving stale '%s' from cache. Refreshing in background.", exam_name)
+            threading.Thread(target=_refresh_stale_questions, args=(exam_name,), daemon=True).start()
+        return stale_entry['data'], None
+
+    return _refresh_cached_questions(exam_name)
+
+def _refresh_stale_questions(exam_name):
+    """Background refresh for stale-while-revalidate. Clears the in-flight mark even
+       if the refresh stored nothing, so a later request can try again."""
+    try:
+        _refresh_cached_questions(exam_name)
+    finally:
+        with CACHE_LOCK:
+            _REFRESHING_EXAMS.discard(exam_name)
+
+def _refresh_cached_questions(exam_name, force=False):
+    # Singleflight: concurrent misses for the same exam wait here for one fetch
+    with _get_fetch_lock(exam_name):
+        if not force:
+            cached_result = _fresh_cached_result(exam_name, time.monotonic())
+            if cached_result:
+                app.logger.info("Serving '%s' from cache populated by a concurrent fetch.", exam_name)
+                return cached_result
+            shared_entry = _load_shared_cached_questions(exam_name)
+            if shared_entry and time.monotonic() - shared_entry['timestamp'] < CACHE_DURATION_SECONDS:
+                return shared_entry['data'], None
+
+        client = get_gspread_client()
+        if not client:
+            # Not cached: the next request should retry authentication straight away
+            app.logger.error("No gspread client to fetch '%s'.", exam_name)
+            return None, "Could not connect to data source."
+
+        app.logger.info("Cache miss/expired/stale-error for '%s'. Fetching fresh data.", exam_name)
+        current_time = time.monotonic()
+        questions, error_msg = get_questions_for_exam_from_sheet(client, exam_name)
+        _store_cached_questions(exam_name, questions, error_msg, current_time)
+    return questions, error_msg
+
+def _store_cached_questions(exam_name, questions, error_msg, timestamp, publish=True):
+    if publish and not error_msg:
+        _save_shared_cached_questions(exam_name, questions, timestamp)
+    with CACHE_LOCK:
+        _put_cached_entry(exam_name, questions, error_msg, timestamp)
+    if publish and not error_msg:
+        _save_cache_snapshot()
+
+def _put_cached_entry(exam_name, questions, error_msg, timestamp):
+    """Files a fetch result in the cache matching its outcome. Caller must hold CACHE_LOCK."""
+    global _SUCCESS_CACHE, _QUOTA_CACHE, _ERROR_CACHE
+    # Copy-on-write: the exam leaves all three caches, then joins one of the copies.
+    # A failed refresh keeps the last good questions until the hard expiry, so
+    # users keep getting them while the error entry holds off further refetches
+    success_entry = _SUCCESS_CACHE.get(exam_name)
+    keep_success = bool(error_msg and success_entry and timestamp - success_entry['timestamp'] < CACHE_HARD_EXPIRY_SECONDS)
+    success_cache, quota_cache, error_cache = (
+        {name: entry for name, entry in cache.items() if name != exam_name}
+        for cache in (_SUCCESS_CACHE, _QUOTA_CACHE, _ERROR_CACHE)
+    )
+    if keep_success:
+        success_cache[exam_name] = success_entry
+    if not error_msg:
+        cache, cached_entry = success_cache, {'timestamp': timestamp, 'data': questions}
+    elif "Quota exceeded" in error_msg:
+        cache, cached_entry = quota_cache, {'timestamp': timestamp, 'error': error_msg}
+    else:
+        cache, cached_entry = error_cache, {'timestamp': timestamp, 'error': error_msg}
+    cache[exam_name] = cached_entry
+    app.logger.info("Updated cache for '%s'. Error: %s", exam_name, error_msg is not None)
+    while len(cache) > CACHE_MAX_ENTRIES:
+        _evict_oldest_cached_exam(cache)
+    _SUCCESS_CACHE, _QUOTA_CACHE, _ERROR_CACHE = success_cache, quota_cache, error_cache
+
+def _evict_oldest_cached_exam(cache):
+    """Drops the least recently fetched exam from an unpublished cache copy. Caller must hold CACHE_LOCK."""
+    oldest = min(cache, key=lambda name: cache[name]['timestamp'])
+    del cache[oldest]
+    with _FETCH_LOCKS_LOCK:
+        fetch_lock = _FETCH_LOCKS.get(oldest)
+        if fetch_lock is not None and not fetch_lock.locked():
+            del _FETCH_LOCKS[oldest]
+    app.logger.info("Evicted '%s' from cache (limit %s exams).", oldest, CACHE_MAX_ENTRIES)
+
+def prime_cache(client):
+    """Warms the cache for every exam with two Sheets calls: one for the tab
+       titles and one values.batchGet for all of their questions.
+       Returns (exam_names, error)."""
     if not GOOGLE_SHEET_ID: return [], "GOOGLE_SHEET_ID not set."
     if not client: return [], "gspread client not available."
+    global _LAST_PRIME
+    exam_names = []
     try:
-        spreadsheet = client.open_by_key(GOOGLE_SHEET_ID)
-        worksheet = spreadsheet.worksheet(exam_name)
-        return _fetch_and_parse_questions(worksheet, exam_name)
-    except gspread.exceptions.WorksheetNotFound:
-        app.logger.error(f"Worksheet '{exam_name}' not found in {GOOGLE_SHEET_ID}.")
-        return [], f"Exam tab '{exam_name}' not found."
+        current_time = time.monotonic()
+        spreadsheet = get_spreadsheet(client)
+        # An unedited sheet needs no re-read: just extend what is already cached
+        modified_time = _sheet_modified_time(spreadsheet)
+        last_prime = _LAST_PRIME
+        if modified_time is not None and last_prime and modified_time == last_prime['modified_time']:
+            if all(name in _SUCCESS_CACHE for name in last_prime['parsed_names']):
+                _extend_cached_exams(last_prime['exam_names'], last_prime['parsed_names'], current_time)
+                return last_prime['exam_names'], None
+        exam_names = _exam_sheet_titles(spreadsheet)
+        if not exam_names: return [], None
+        response = _call_with_backoff(
+            spreadsheet.values_batch_get,
+            # gspread writes 'ranges' into the params dict it is given, so pass a copy
+            ranges=[_sheet_range(name) for name in exam_names], params=dict(VALUES_BATCH_GET_PARAMS)
+        )
     except gspread.exceptions.APIError as e:
-        app.logger.error(f"Sheets API Error for {exam_name}: {e}")
-        status_code = getattr(getattr(e, 'response', None), 'status_code', None)
-        if status_code == 429: return [], "Quota exceeded fetching questions."
-        return [], f"Sheets API error: {getattr(e, 'message', str(e))}"
+        app.logger.error("Sheets API Error batch fetching exams: %s", e)
+        status_code = _api_status_code(e)
+        if status_code in SPREADSHEET_ACCESS_STATUS_CODES: _reset_spreadsheet()
+        if status_code == 429: return exam_names, "Quota exceeded batch fetching exams."
+        return exam_names, f"Sheets API error: {getattr(e, 'message', str(e))}"
+    except RefreshError as e:
+        app.logger.error("Google credentials rejected batch fetching exams: %s", e)
+        _reset_gspread_client()
+        return exam_names, "Could not authenticate with Google Sheets."
     except Exception as e:
-        app.logger.error(f"Error fetching questions for {exam_name}: {e}")
-        return [], f"Unexpected error fetching questions: {e}"
+        app.logger.error("Error batch fetching exams: %s", e)
+        return exam_names, f"Unexpected error batch fetching exams: {e}"
 
-def get_cached_questions_for_exam(client, exam_name):
-    current_time = time.time()
-    with CACHE_LOCK: cached_entry = EXAM_DATA_CACHE.get(exam_name)
+    results = []
+    for exam_name, value_range in zip(exam_names, response.get('valueRanges', [])):
+        questions, error_msg = _parse_question_values(value_range.get('values', []), exam_name)
+        if not error_msg:
+            _save_shared_cached_questions(exam_name, questions, current_time)
+        results.append((exam_name, questions, error_msg))
+    # One lock acquisition, so readers see the whole batch land at once
+    with CACHE_LOCK:
+        for exam_name, questions, error_msg in results:
+            _put_cached_entry(exam_name, questions, error_msg, current_time)
+    _save_cache_snapshot()
+    _save_shared_exam_titles(exam_names, current_time)
+    _LAST_PRIME = {
+        'modified_time': modified_time, 'exam_names': exam_names,
+        'parsed_names': [exam_name for exam_name, _, error_msg in results if not error_msg]
+    }
+    app.logger.info("Batch fetched %s exams in one request.", len(results))
+    return exam_names, None
 
-    if cached_entry and (current_time - cached_entry['timestamp'] < CACHE_DURATION_SECONDS):
-        if cached_entry['error'] and "Quota exceeded" not in cached_entry['error'] and \
-           current_time - cached_entry['timestamp'] > 60: 
-            app.logger.info(f"Stale non-quota error in cache for '{exam_name}'. Re-fetching.")
-        else:
-            app.logger.info(f"Serving '{exam_name}' from cache. Cached at {time.ctime(cached_entry['timestamp'])}.")
-            return cached_entry['data'], cached_entry['error'] 
-    
-    app.logger.info(f"Cache miss/expired/stale-error for '{exam_name}'. Fetching fresh data.")
-    questions, error_msg = get_questions_for_exam_from_sheet(client, exam_name)
+def _sheet_modified_time(spreadsheet):
+    """The sheet's Drive modifiedTime, or None if Drive can't be queried (prime_cache then re-reads everything)."""
+    try:
+        return _call_with_backoff(spreadsheet.get_lastUpdateTime)
+    except RefreshError:
+        raise
+    except Exception as e:
+        # APIError (e.g. Drive API disabled), or AttributeError on gspread < 5.12
+        app.logger.warning("Could not read sheet modifiedTime from Drive: %s", e)
+        return None
+
+def _extend_cached_exams(exam_names, parsed_names, timestamp):
+    """Marks the exam list and the cached exams in parsed_names as fetched at
+       timestamp, reusing their questions."""
+    global _SUCCESS_CACHE, _EXAM_TITLES_CACHE
     with CACHE_LOCK:
-        EXAM_DATA_CACHE[exam_name] = {
-            'timestamp': current_time, 'data': questions, 'error': error_msg
-        }
-        app.logger.info(f"Updated cache for '{exam_name}'. Error: {error_msg is not None}")
-    return questions, error_msg
+        success_cache = dict(_SUCCESS_CACHE)
+        for exam_name in parsed_names:
+            success_cache[exam_name] = {'timestamp': timestamp, 'data': success_cache[exam_name]['data']}
+        _SUCCESS_CACHE = success_cache
+        _EXAM_TITLES_CACHE = {'timestamp': timestamp, 'data': exam_names}
+    for exam_name in parsed_names:
+        _save_shared_cached_questions(exam_name, success_cache[exam_name]['data'], timestamp)
+    _save_shared_exam_titles(exam_names, timestamp)
+    _save_cache_snapshot()
+    app.logger.info("Sheet unchanged since last fetch; extended %s cached exams.", len(parsed_names))
+
+def _prewarm_loop():
+    """Keeps every exam cached so requests never wait on a Sheets fetch.
+       Runs in each worker process, since each has its own cache."""
+    interval = CACHE_DURATION_SECONDS * 0.8
+    time.sleep(1)
+    while True:
+        try:
+            if _claim_shared_prewarm(interval):
+                exams, batch_error = prime_cache(get_gspread_client())
+                if batch_error and "Quota exceeded" in batch_error:
+                    # Per-exam fetches would only spend more of the exhausted quota; wait for the next round
+                    app.logger.warning("Cache prewarm: Batch fetch hit the quota (%s). Retrying next round.", batch_error)
+                elif batch_error:
+                    app.logger.warning("Cache prewarm: Batch fetch failed (%s). Fetching exams one by one.", batch_error)
+                    for exam_name in exams:
+                        _refresh_cached_questions(exam_name, force=True)
+                    if exams: _save_shared_exam_titles(exams, time.monotonic())
+                app.logger.info("Cache prewarm: Refreshed %s exams.", len(exams))
+            else:
+                # Another process reads Sheets this round: wait for it to publish, then
+                # copy its results. Titles from an earlier round (over half an interval
+                # old) don't count. Exams missing from Redis keep their local or
+                # snapshot data rather than being fetched here one by one
+                exams = _wait_for_shared_exam_titles(interval / 2)
+                if exams is None:
+                    app.logger.warning("Cache prewarm: Nothing published to the shared cache within %ss; keeping local cache.", SHARED_PREWARM_WAIT_SECONDS)
+                else:
+                    loaded = sum(1 for exam_name in exams if _load_shared_cached_questions(exam_name))
+                    app.logger.info("Cache prewarm: Loaded %s of %s exams via shared cache.", loaded, len(exams))
+        except Exception as e:
+            app.logger.error("Cache prewarm: Unexpected error: %s", e)
+        time.sleep(interval)
+
+_load_cache_snapshot()
+if PREWARM_CACHE and GOOGLE_SHEET_ID:
+    threading.Thread(target=_prewarm_loop, name="cache-prewarm", daemon=True).start()
+
+
+# --- Session Helpers ---
+# Everything an in-progress exam keeps in the session; answer feedback lives
+# under the single 'last_feedback' key rather than one key per question
+# The question order is stored as a seed plus question count, not the full permutation
+EXAM_SESSION_KEYS = ('exam_name', 'shuffle_seed', 'question_total', 'current_shuffled_idx_position', 'last_feedback')
+
+def _clear_exam_session():
+    for key in EXAM_SESSION_KEYS:
+        session.pop(key, None)
+
+@lru_cache(maxsize=256)
+def _shuffled_question_order(shuffle_seed, question_total):
+    """The session's question order, regenerated from its seed (once per worker)."""
+    order = list(range(question_total))
+    random.Random(shuffle_seed).shuffle(order)
+    return tuple(order)
+
+def _require_exam_session():
+    """(exam_name, shuffle_seed, question_total, position) of the exam in progress, or None."""
+    exam_name = session.get('exam_name')
+    shuffle_seed = session.get('shuffle_seed')
+    question_total = session.get('question_total')
+    position = session.get('current_shuffled_idx_position')
+    if exam_name is None or shuffle_seed is None or question_total is None or position is None:
+        return None
+    return exam_name, shuffle_seed, question_total, position
+
+
+# --- HTTP Caching ---
+# The exam list changes rarely, so browsers may reuse the main page briefly
+MAIN_PAGE_CACHE_CONTROL = 'private, max-age=60'
+QUESTION_CACHE_CONTROL = 'private, max-age=0, must-revalidate'
+
+def _template_version():
+    """Digest of every template's source (plus the Cloud Run revision, if any), so
+       pages cached by browsers stop matching once a deploy changes the HTML."""
+    digest = hashlib.blake2b(os.environ.get("K_REVISION", "").encode(), digest_size=8)
+    for template_name in sorted(app.jinja_env.list_templates()):
+        digest.update(template_name.encode())
+        digest.update(app.jinja_env.loader.get_source(app.jinja_env, template_name)[0].encode())
+    return digest.hexdigest()
+
+# Part of every ETag
+TEMPLATE_VERSION = _template_version()
+
+def _conditional_response(etag, cache_control, render_page):
+    """304 if the browser already holds this ETag, otherwise the rendered page."""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render_page())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 
 # --- Flask Routes (REMAINS THE SAME, including randomization logic) ---
@@ -188,164 +925,142 @@ def get_cached_questions_for_exam(client, exam_name):
 # <PASTE THE FLASK ROUTES FROM YOUR LAST WORKING app.py HERE>
 @app.route('/')
 def main_page():
-    client = get_gspread_client()
-    if not client:
-        app.logger.error("Main page: No gspread client.")
-        return render_template('main.html', error="Could not connect to data source.", exams=[])
-    
-    exams, error_msg = get_exam_sheets(client)
+    exams, error_msg = get_cached_exam_sheets()
     if error_msg:
-        app.logger.error(f"Main page: Error fetching exam sheets: {error_msg}")
+        app.logger.error("Main page: Error fetching exam sheets: %s", error_msg)
         return render_template('main.html', error=error_msg, exams=exams or []) 
     
-    session.pop('exam_name', None)
-    session.pop('shuffled_question_indices', None) 
-    session.pop('current_shuffled_idx_position', None) 
-    for key in [k for k in session if k.startswith('feedback_q')]: session.pop(key, None)
-            
-    return render_template('main.html', exams=exams, title="Select Exam", message=request.args.get('message'))
+    _clear_exam_session()
+
+    message = request.args.get('message')
+    etag = hashlib.blake2b(orjson.dumps([TEMPLATE_VERSION, exams, message]), digest_size=8).hexdigest()
+    return _conditional_response(etag, MAIN_PAGE_CACHE_CONTROL, lambda: render_template(
+        'main.html', exams=exams, title="Select Exam", message=message
+    ))
 
 @app.route('/exam/<exam_name>')
 def start_exam(exam_name):
-    client = get_gspread_client()
-    if not client:
-        app.logger.error(f"Start exam '{exam_name}': No gspread client.")
-        abort(500, "Application setup error: Could not connect to data source.") 
-    
-    questions_original_order, error_msg = get_cached_questions_for_exam(client, exam_name)
+    questions_original_order, error_msg = get_cached_questions_for_exam(exam_name)
     if error_msg:
-        app.logger.error(f"Start exam '{exam_name}': Error loading questions: {error_msg}")
+        app.logger.error("Start exam '%s': Error loading questions: %s", exam_name, error_msg)
         return redirect(url_for('main_page', error=f"Error loading '{exam_name}': {error_msg}"))
     if not questions_original_order:
-        app.logger.warning(f"Start exam '{exam_name}': No questions found.")
+        app.logger.warning("Start exam '%s': No questions found.", exam_name)
         return redirect(url_for('main_page', error=f"No questions found for exam '{exam_name}'."))
 
-    original_indices = list(range(len(questions_original_order)))
-    random.shuffle(original_indices)
-    app.logger.info(f"Starting exam '{exam_name}'. Original question count: {len(questions_original_order)}. Shuffled indices order: {original_indices[:5]}...") 
+    question_total = _question_count(questions_original_order)
+    shuffle_seed = random.randrange(2 ** 63)
+    app.logger.info("Starting exam '%s'. Original question count: %s. Shuffle seed: %s.", exam_name, question_total, shuffle_seed)
 
+    session.permanent = True
     session['exam_name'] = exam_name
-    session['shuffled_question_indices'] = original_indices 
+    session['shuffle_seed'] = shuffle_seed
+    session['question_total'] = question_total
     session['current_shuffled_idx_position'] = 0 
-    
-    for key in [k for k in session if k.startswith('feedback_q')]: session.pop(key, None)
+    session.pop('last_feedback', None)
             
     return redirect(url_for('show_question_page'))
 
 @app.route('/question') 
 def show_question_page():
-    exam_name = session.get('exam_name')
-    shuffled_indices = session.get('shuffled_question_indices')
-    current_shuffled_idx_position = session.get('current_shuffled_idx_position')
-
-    if None in [exam_name, shuffled_indices, current_shuffled_idx_position]:
+    exam_session = _require_exam_session()
+    if exam_session is None:
         app.logger.warning("Show question: Exam session not fully initialized.")
         return redirect(url_for('main_page', error="Exam session not initialized. Select an exam."))
+    exam_name, shuffle_seed, question_total, current_shuffled_idx_position = exam_session
 
-    client = get_gspread_client()
-    if not client: 
-        app.logger.error("Show question: No gspread client.")
-        abort(500, "Application setup error: Could not connect to data source.")
-
-    all_questions_for_exam, error_msg = get_cached_questions_for_exam(client, exam_name)
+    all_questions_for_exam, error_msg = get_cached_questions_for_exam(exam_name)
     if error_msg or not all_questions_for_exam:
-        app.logger.error(f"Show question '{exam_name}': Error/No questions from cache: {error_msg}")
+        app.logger.error("Show question '%s': Error/No questions from cache: %s", exam_name, error_msg)
         return redirect(url_for('main_page', error=f"Error retrieving questions for '{exam_name}': {error_msg or 'No questions available'}"))
     
-    if not 0 <= current_shuffled_idx_position < len(shuffled_indices):
-        app.logger.warning(f"Show question '{exam_name}': Invalid position {current_shuffled_idx_position}. Resetting.")
+    if not 0 <= current_shuffled_idx_position < question_total:
+        app.logger.warning("Show question '%s': Invalid position %s. Resetting.", exam_name, current_shuffled_idx_position)
         return redirect(url_for('main_page', error="Invalid question position. Select exam again."))
 
-    actual_question_index_in_original_list = shuffled_indices[current_shuffled_idx_position]
+    actual_question_index_in_original_list = _shuffled_question_order(shuffle_seed, question_total)[current_shuffled_idx_position]
     
-    if not 0 <= actual_question_index_in_original_list < len(all_questions_for_exam):
-        app.logger.error(f"Show question '{exam_name}': Shuffled index points to invalid original index {actual_question_index_in_original_list}.")
+    if not 0 <= actual_question_index_in_original_list < _question_count(all_questions_for_exam):
+        app.logger.error("Show question '%s': Shuffled index points to invalid original index %s.", exam_name, actual_question_index_in_original_list)
         return redirect(url_for('main_page', error="Internal error with question order. Select exam again."))
 
-    current_question = all_questions_for_exam[actual_question_index_in_original_list]
-    feedback_info = session.get(f'feedback_q{current_question["id"]}') 
+    current_question = _question_view(all_questions_for_exam, actual_question_index_in_original_list)
+    # Only the latest answer is kept; it belongs to this card if the ids match
+    feedback_info = session.get('last_feedback')
+    if feedback_info and feedback_info.get('qid') != current_question.id:
+        feedback_info = None
 
-    return render_template('flashcard.html',
+    # The page only changes with the card's position and content or the answer given.
+    # Hashing the content (not when it was fetched) gives every worker the same tag
+    etag = hashlib.blake2b(orjson.dumps([
+        TEMPLATE_VERSION, exam_name, current_shuffled_idx_position, question_total, tuple(current_question),
+        feedback_info and feedback_info['user_answer']
+    ]), digest_size=8).hexdigest()
+    # Same URL before and after answering, so browsers must always revalidate
+    return _conditional_response(etag, QUESTION_CACHE_CONTROL, lambda: render_template('flashcard.html',
                            title=f"{exam_name} - Q{current_shuffled_idx_position + 1}",
                            exam_name=exam_name,
-                           question_index=current_shuffled_idx_position, 
-                           total_questions=len(shuffled_indices),
+                           question_index=current_shuffled_idx_position,
+                           total_questions=question_total,
                            current_question=current_question,
-                           feedback=feedback_info)
+                           feedback=feedback_info))
 
 @app.route('/answer', methods=['POST'])
 def submit_answer_page():
-    exam_name = session.get('exam_name')
-    shuffled_indices = session.get('shuffled_question_indices')
-    current_shuffled_idx_position = session.get('current_shuffled_idx_position')
-
-    if None in [exam_name, shuffled_indices, current_shuffled_idx_position]:
+    exam_session = _require_exam_session()
+    if exam_session is None:
         app.logger.warning("Submit answer: Exam session not fully initialized.")
         return redirect(url_for('main_page', error="Exam session not initialized."))
+    exam_name, shuffle_seed, question_total, current_shuffled_idx_position = exam_session
 
-    client = get_gspread_client()
-    if not client: 
-        app.logger.error("Submit answer: No gspread client.")
-        abort(500, "Application setup error.")
-
-    all_questions_for_exam, error_msg = get_cached_questions_for_exam(client, exam_name)
+    all_questions_for_exam, error_msg = get_cached_questions_for_exam(exam_name)
     if error_msg or not all_questions_for_exam:
-        app.logger.error(f"Submit answer '{exam_name}': Error/No questions from cache: {error_msg}")
+        app.logger.error("Submit answer '%s': Error/No questions from cache: %s", exam_name, error_msg)
         return redirect(url_for('main_page', error=f"Error retrieving questions for '{exam_name}' to process answer."))
     
-    if not 0 <= current_shuffled_idx_position < len(shuffled_indices):
-        app.logger.warning(f"Submit answer '{exam_name}': Invalid position {current_shuffled_idx_position}.")
+    if not 0 <= current_shuffled_idx_position < question_total:
+        app.logger.warning("Submit answer '%s': Invalid position %s.", exam_name, current_shuffled_idx_position)
         return redirect(url_for('main_page', error="Invalid question position during answer submission."))
 
-    actual_question_index_in_original_list = shuffled_indices[current_shuffled_idx_position]
-    if not 0 <= actual_question_index_in_original_list < len(all_questions_for_exam):
-        app.logger.error(f"Submit answer '{exam_name}': Shuffled index points to invalid original index {actual_question_index_in_original_list}.")
+    actual_question_index_in_original_list = _shuffled_question_order(shuffle_seed, question_total)[current_shuffled_idx_position]
+    if not 0 <= actual_question_index_in_original_list < _question_count(all_questions_for_exam):
+        app.logger.error("Submit answer '%s': Shuffled index points to invalid original index %s.", exam_name, actual_question_index_in_original_list)
         return redirect(url_for('main_page', error="Internal error with question order. Select exam again."))
         
-    current_question = all_questions_for_exam[actual_question_index_in_original_list]
+    current_question = _question_view(all_questions_for_exam, actual_question_index_in_original_list)
     user_answer_key = request.form.get('answer')
 
     if not user_answer_key:
-        app.logger.warning(f"Submit answer '{exam_name}', Q_id {current_question['id']}: No answer submitted.")
+        app.logger.warning("Submit answer '%s', Q_id %s: No answer submitted.", exam_name, current_question.id)
         return redirect(url_for('show_question_page'))
 
-    user_answer_text = current_question['options'].get(user_answer_key, "N/A")
-    is_correct = (user_answer_key == current_question['correct_option_key'])
-    feedback = {"user_answer": user_answer_key, "user_answer_text": user_answer_text, "is_correct": is_correct}
-    session[f'feedback_q{current_question["id"]}'] = feedback 
-    app.logger.info(f"Answer for '{exam_name}', Q_id {current_question['id']} (shuffled_pos {current_shuffled_idx_position}): User '{user_answer_key}', Correct: {is_correct}")
+    answer_idx = OPTION_INDEX.get(user_answer_key, -1)
+    user_answer_text = current_question.options[answer_idx] if answer_idx >= 0 else "N/A"
+    is_correct = answer_idx >= 0 and answer_idx == current_question.correct_idx
+    session['last_feedback'] = {
+        "qid": current_question.id, "user_answer": user_answer_key,
+        "user_answer_text": user_answer_text, "is_correct": is_correct
+    }
+    app.logger.info("Answer for '%s', Q_id %s (shuffled_pos %s): User '%s', Correct: %s", exam_name, current_question.id, current_shuffled_idx_position, user_answer_key, is_correct)
     
     return redirect(url_for('show_question_page'))
 
 @app.route('/next_question')
 def next_question_page():
-    exam_name = session.get('exam_name')
-    shuffled_indices = session.get('shuffled_question_indices')
-    current_shuffled_idx_position = session.get('current_shuffled_idx_position')
-
-    if None in [exam_name, shuffled_indices, current_shuffled_idx_position]:
+    exam_session = _require_exam_session()
+    if exam_session is None:
         app.logger.warning("Next question: Exam session not fully initialized.")
         return redirect(url_for('main_page', error="Exam session not initialized."))
+    exam_name, _, question_total, current_shuffled_idx_position = exam_session
 
-    client = get_gspread_client()
-    if client: 
-        all_questions_for_exam, _ = get_cached_questions_for_exam(client, exam_name)
-        if all_questions_for_exam and 0 <= current_shuffled_idx_position < len(shuffled_indices):
-            actual_old_idx = shuffled_indices[current_shuffled_idx_position]
-            if 0 <= actual_old_idx < len(all_questions_for_exam):
-                question_id_to_clear = all_questions_for_exam[actual_old_idx]['id']
-                session.pop(f'feedback_q{question_id_to_clear}', None)
-    else:
-        app.logger.warning("Next question: No gspread client, cannot fetch questions to clear feedback precisely by ID.")
+    session.pop('last_feedback', None)
 
-    if current_shuffled_idx_position + 1 < len(shuffled_indices):
+    if current_shuffled_idx_position + 1 < question_total:
         session['current_shuffled_idx_position'] = current_shuffled_idx_position + 1
-        app.logger.info(f"Next Q for '{exam_name}', new shuffled_pos: {session['current_shuffled_idx_position']}")
+        app.logger.info("Next Q for '%s', new shuffled_pos: %s", exam_name, session['current_shuffled_idx_position'])
     else:
-        app.logger.info(f"Completed all questions for '{exam_name}'.")
-        session.pop('exam_name', None)
-        session.pop('shuffled_question_indices', None)
-        session.pop('current_shuffled_idx_position', None)
+        app.logger.info("Completed all questions for '%s'.", exam_name)
+        _clear_exam_session()
         return redirect(url_for('main_page', message=f"You've completed all questions for {exam_name}! Choose another exam."))
 
     return redirect(url_for('show_question_page'))
@@ -353,8 +1068,7 @@ def next_question_page():
 
 # --- Main Execution ---
 if __name__ == '__main__':
-    is_debug_mode = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
-    app.logger.info(f"Application starting in {'DEBUG' if is_debug_mode else 'PRODUCTION'} mode.")
-    app.run(debug=is_debug_mode, 
+    app.logger.info("Application starting in %s mode.", 'DEBUG' if IS_DEBUG_MODE else 'PRODUCTION')
+    app.run(debug=IS_DEBUG_MODE, 
             host='0.0.0.0', 
             port=int(os.environ.get('PORT', 8080)))
\ No newline at end of file
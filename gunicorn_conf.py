@@ -0,0 +1,12 @@
+# Gunicorn settings for production (Cloud Run / Procfile).
+# Requests mostly wait on the Google Sheets API, so each worker runs several
+# threads: a cache miss being fetched doesn't block cache hits on other threads.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2 * multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# Cloud Run handles request timeouts itself; let slow Sheets retries finish
+timeout = 0